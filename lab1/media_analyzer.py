@@ -2,90 +2,125 @@
 """
 Media File Analyzer
 Analyzes MP3 and WAV files to extract duration and metadata
-using pydub and mutagen libraries.
+using mutagen library (header parsing only, no audio decoding).
 """
 
 import os
 import sys
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from pydub import AudioSegment
+from typing import Dict, Optional
 from mutagen import File as MutagenFile
 from mutagen.mp3 import MP3
 from mutagen.wave import WAVE
 
+SUPPORTED_EXTENSIONS = frozenset({'.mp3', '.wav'})
+SEP_EQ = "=" * 60
 
-def is_media_file(filename):
+
+def find_existing_files(filenames):
+    """Return the subset of filenames that exist, scanning each directory once"""
+    by_directory = {}
+    for filename in filenames:
+        directory = os.path.dirname(filename) or '.'
+        by_directory.setdefault(directory, []).append(filename)
+
+    existing = set()
+    for directory, names in by_directory.items():
+        # A single name is one stat, cheaper than listing the directory
+        if len(names) == 1:
+            if os.path.exists(names[0]):
+                existing.add(names[0])
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                present = {entry.name for entry in entries if entry.is_file()}
+        except OSError:
+            continue
+        existing.update(name for name in names
+                        if os.path.basename(name) in present)
+
+    return existing
+
+
+def is_media_file(filename, existing=None):
     """Check if the file is a supported media file (mp3 or wav)"""
-    if not os.path.exists(filename):
+    if existing is not None:
+        found = filename in existing
+    else:
+        found = os.path.exists(filename)
+    if not found:
         return False, "File does not exist"
 
     ext = Path(filename).suffix.lower()
-    if ext not in ['.mp3', '.wav']:
+    if ext not in SUPPORTED_EXTENSIONS:
         return False, f"Unsupported format: {ext}. Only .mp3 and .wav are supported"
 
     return True, ext
 
 
-def get_duration(filename, file_ext):
-    """Get duration of media file in seconds using pydub"""
-    try:
-        if file_ext == '.mp3':
-            audio = AudioSegment.from_mp3(filename)
-        elif file_ext == '.wav':
-            audio = AudioSegment.from_wav(filename)
-        else:
-            return None
-
-        duration_seconds = len(audio) / 1000.0
-        return duration_seconds
-    except Exception as e:
-        print(f"Error reading duration: {e}")
-        return None
+@dataclass
+class MediaInfo:
+    """Duration, stream info and tags of a media file"""
+    duration: Optional[float] = None
+    bitrate: Optional[int] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    tags: Dict[str, str] = field(default_factory=dict)
+    # Read errors, reported in the file's own section by print_report
+    file_error: Optional[str] = None
+    duration_error: Optional[str] = None
 
 
-def get_metadata(filename):
-    """Get metadata from media file using mutagen"""
-    try:
-        audio = MutagenFile(filename)
+def wav_header_duration(filename):
+    """Get WAV duration from the RIFF header (frame count / frame rate)"""
+    with wave.open(filename, 'rb') as wav:
+        return wav.getnframes() / float(wav.getframerate())
 
-        if audio is None:
-            return {}
-
-        metadata = {}
-
-        # Extract common metadata
-        if hasattr(audio, 'tags') and audio.tags:
-            for key, value in audio.tags.items():
-                # Convert value to string, handling lists
-                if isinstance(value, list):
-                    metadata[key] = ', '.join(str(v) for v in value)
-                else:
-                    metadata[key] = str(value)
-
-        # Add file info
-        if hasattr(audio, 'info'):
-            info = audio.info
-            if hasattr(info, 'bitrate') and info.bitrate:
-                metadata['bitrate'] = f"{info.bitrate} bps"
-            if hasattr(info, 'sample_rate') and info.sample_rate:
-                metadata['sample_rate'] = f"{info.sample_rate} Hz"
-            if hasattr(info, 'channels') and info.channels:
-                metadata['channels'] = str(info.channels)
-
-        return metadata
-    except Exception as e:
-        print(f"Error reading metadata: {e}")
-        return {}
 
+def analyze(filename, file_ext):
+    """Read duration, stream info and tags in a single mutagen pass"""
+    info = MediaInfo()
 
-def analyze_media_file(filename):
-    """Main function to analyze media file"""
-    print(f"\n{'='*60}")
+    try:
+        audio = MutagenFile(filename)
+    except Exception as e:
+        info.file_error = str(e)
+        audio = None
+
+    if audio is not None:
+        # Extract common metadata (list values are joined into one string)
+        tags = getattr(audio, 'tags', None)
+        if tags:
+            info.tags = {key: ', '.join(map(str, value)) if type(value) is list
+                         else str(value)
+                         for key, value in tags.items()}
+
+        # Add file info (mutagen computes length without decoding samples)
+        stream = getattr(audio, 'info', None)
+        if stream is not None:
+            info.duration = getattr(stream, 'length', None) or None
+            info.bitrate = getattr(stream, 'bitrate', None) or None
+            info.sample_rate = getattr(stream, 'sample_rate', None) or None
+            info.channels = getattr(stream, 'channels', None) or None
+
+    # Fallback for WAV files mutagen could not measure
+    if info.duration is None and file_ext == '.wav':
+        try:
+            info.duration = wav_header_duration(filename)
+        except Exception as e:
+            info.duration_error = str(e)
+
+    return info
+
+
+def print_report(filename, is_valid, result, info):
+    """Print analysis report of a single media file"""
+    print(f"\n{SEP_EQ}")
     print(f"Analyzing file: {filename}")
-    print(f"{'='*60}\n")
-
-    # Check if file is a supported media file
-    is_valid, result = is_media_file(filename)
+    print(f"{SEP_EQ}\n")
 
     if not is_valid:
         print(f"Error: {result}")
@@ -93,10 +128,14 @@ def analyze_media_file(filename):
 
     file_ext = result
     print(f"File format: {file_ext.upper()}")
+    if info.file_error:
+        print(f"Error reading file: {info.file_error}")
 
     # Get duration
     print("\n--- Duration ---")
-    duration = get_duration(filename, file_ext)
+    if info.duration_error:
+        print(f"Error reading duration: {info.duration_error}")
+    duration = info.duration
     if duration is not None:
         print(f"Duration: {duration:.2f} seconds ({duration/60:.2f} minutes)")
     else:
@@ -104,7 +143,13 @@ def analyze_media_file(filename):
 
     # Get metadata
     print("\n--- Metadata ---")
-    metadata = get_metadata(filename)
+    metadata = dict(info.tags)
+    if info.bitrate:
+        metadata['bitrate'] = f"{info.bitrate} bps"
+    if info.sample_rate:
+        metadata['sample_rate'] = f"{info.sample_rate} Hz"
+    if info.channels:
+        metadata['channels'] = str(info.channels)
 
     if metadata:
         for key, value in metadata.items():
@@ -112,19 +157,40 @@ def analyze_media_file(filename):
     else:
         print("No metadata available")
 
-    print(f"\n{'='*60}\n")
+    print(f"\n{SEP_EQ}\n")
     return True
 
 
+def analyze_media_files(filenames):
+    """Analyze several media files, reading their headers concurrently"""
+    filenames = list(filenames)
+    existing = find_existing_files(filenames)
+    checks = [is_media_file(filename, existing) for filename in filenames]
+
+    # Header parsing is I/O bound, so threads overlap the file reads
+    to_read = {filename: result
+               for filename, (is_valid, result) in zip(filenames, checks)
+               if is_valid}
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        infos = dict(zip(to_read, executor.map(analyze, to_read, to_read.values())))
+
+    return [print_report(filename, is_valid, result, infos.get(filename))
+            for filename, (is_valid, result) in zip(filenames, checks)]
+
+
+def analyze_media_file(filename):
+    """Main function to analyze media file"""
+    return analyze_media_files([filename])[0]
+
+
 def main():
     """Entry point of the script"""
     if len(sys.argv) < 2:
-        print("Usage: python media_analyzer.py <filename>")
+        print("Usage: python media_analyzer.py <filename> [<filename> ...]")
         print("Example: python media_analyzer.py sample.mp3")
         sys.exit(1)
 
-    filename = sys.argv[1]
-    analyze_media_file(filename)
+    analyze_media_files(sys.argv[1:])
 
 
 if __name__ == "__main__":
@@ -6,11 +6,20 @@ Uploads audio file to S3 and transcribes it using AWS Transcribe with automatic
 
 import os
 import sys
+import hashlib
 import time
 import json
-import urllib.request
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import ijson
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
@@ -23,6 +32,155 @@ AWS_SECRET_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 AWS_REGION = os.getenv('AWS_DEFAULT_REGION', 'eu-west-1')
 BUCKET_NAME = 'media-labs-audio-transcribe'
 
+# Console/report separators
+SEP_EQ = "=" * 60
+SEP_DASH = "-" * 60
+
+# Long-lived client settings: pooled keep-alive connections, adaptive retries
+BOTO_CONFIG = Config(
+    max_pool_connections=32,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=60
+)
+
+# HTTP connection pool for downloading Transcribe results
+HTTP_POOL_SIZE = 16
+
+# S3 multipart upload settings
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+UPLOAD_CONCURRENCY = 16
+
+# Transcription status polling (exponential backoff)
+POLL_INITIAL_DELAY = 1  # seconds
+POLL_MAX_DELAY = 15  # seconds
+
+# Upper bound on files (and Transcribe jobs) processed at once in batch mode
+MAX_BATCH_WORKERS = 8
+
+
+class TranscriptItems:
+    """
+    Per-word Transcribe items stored column-wise (one list per field)
+    Avoids keeping one small dict per word; saved as numpy arrays
+    """
+
+    TYPE_CODES = {'pronunciation': 0, 'punctuation': 1}
+
+    def __init__(self):
+        self.start_time = []
+        self.end_time = []
+        self.content = []
+        self.confidence = []
+        self.type = []
+
+    def __len__(self):
+        return len(self.type)
+
+    def add(self, start_time=None, end_time=None, item_type=None,
+            content='', confidence=None):
+        """Append one item; missing times/confidence are stored as NaN"""
+        self.start_time.append(_to_float(start_time))
+        self.end_time.append(_to_float(end_time))
+        self.type.append(self.TYPE_CODES.get(item_type, -1))
+        self.content.append(content)
+        self.confidence.append(_to_float(confidence))
+
+    def set_last(self, field, value):
+        """Set a field of the most recently added item"""
+        if field == 'type':
+            self.type[-1] = self.TYPE_CODES.get(value, -1)
+        elif field == 'content':
+            self.content[-1] = value
+        else:
+            getattr(self, field)[-1] = _to_float(value)
+
+    @classmethod
+    def from_result(cls, result):
+        """Build columns from an already loaded full result JSON"""
+        items = cls()
+        for item in result['results'].get('items', []):
+            alternative = (item.get('alternatives') or [{}])[0]
+            items.add(item.get('start_time'), item.get('end_time'),
+                      item.get('type'), alternative.get('content', ''),
+                      alternative.get('confidence'))
+        return items
+
+    def to_arrays(self):
+        """Convert columns to numpy arrays"""
+        return {
+            'start_time': np.array(self.start_time, dtype=np.float32),
+            'end_time': np.array(self.end_time, dtype=np.float32),
+            'content': np.array(self.content, dtype=np.str_),
+            'confidence': np.array(self.confidence, dtype=np.float32),
+            'type': np.array(self.type, dtype=np.int8)
+        }
+
+
+def _to_float(value):
+    """Convert Transcribe numeric strings to float (NaN when missing)"""
+    return float(value) if value is not None else float('nan')
+
+
+def file_sha256(file_path):
+    """SHA-256 hex digest of file content"""
+    with open(file_path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def job_name_for(audio_file, digest):
+    """Transcribe job name of an audio file with the given content digest"""
+    return f"transcribe-{Path(audio_file).stem}-{digest}"
+
+
+ITEM_PREFIX = 'results.items.item'
+ALTERNATIVE_PREFIX = ITEM_PREFIX + '.alternatives.item'
+
+
+def parse_transcript_summary(stream, items=None):
+    """
+    Stream-parse a Transcribe result JSON keeping only transcript and metadata
+    Per-word 'items' are skipped, or collected column-wise into `items`
+    """
+    summary = {}
+    transcript = None
+    language_code = None
+    alternative_index = 0
+
+    for prefix, event, value in ijson.parse(stream):
+        if items is not None and prefix.startswith(ITEM_PREFIX):
+            if prefix == ITEM_PREFIX and event == 'start_map':
+                items.add()
+                alternative_index = -1
+            elif prefix == ALTERNATIVE_PREFIX and event == 'start_map':
+                alternative_index += 1
+            elif prefix.startswith(ALTERNATIVE_PREFIX + '.'):
+                # Keep only the top alternative of each item
+                field = prefix[len(ALTERNATIVE_PREFIX) + 1:]
+                if alternative_index == 0 and field in ('content', 'confidence'):
+                    items.set_last(field, value)
+            elif prefix.startswith(ITEM_PREFIX + '.'):
+                field = prefix[len(ITEM_PREFIX) + 1:]
+                if field in ('start_time', 'end_time', 'type'):
+                    items.set_last(field, value)
+            continue
+
+        if event != 'string':
+            continue
+        if prefix == 'results.transcripts.item.transcript' and transcript is None:
+            transcript = value
+        elif prefix == 'results.language_code':
+            language_code = value
+        elif prefix in ('jobName', 'status'):
+            summary[prefix] = value
+
+    results = {'transcripts': [{'transcript': transcript or ''}]}
+    if language_code:
+        results['language_code'] = language_code
+    summary['results'] = results
+    return summary
+
 
 class AudioTranscriber:
     """Handles audio transcription using AWS S3 and Transcribe services"""
@@ -32,29 +190,60 @@ class AudioTranscriber:
         self.region = AWS_REGION
         self.bucket_name = BUCKET_NAME
 
-        # Initialize S3 client
-        self.s3 = boto3.client(
-            's3',
+        # One session shared by both clients
+        self.session = boto3.session.Session(
             region_name=self.region,
             aws_access_key_id=AWS_ACCESS_KEY,
             aws_secret_access_key=AWS_SECRET_KEY
         )
 
+        # Initialize S3 client
+        self.s3 = self.session.client('s3', config=BOTO_CONFIG)
+
         # Initialize Transcribe client
-        self.transcribe = boto3.client(
-            'transcribe',
-            region_name=self.region,
-            aws_access_key_id=AWS_ACCESS_KEY,
-            aws_secret_access_key=AWS_SECRET_KEY
+        self.transcribe = self.session.client('transcribe', config=BOTO_CONFIG)
+
+        # Pooled HTTP session for result downloads
+        self.http = requests.Session()
+        self.http.mount('https://', HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.5)
+        ))
+
+        # Parallel multipart upload for large audio files
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+            max_concurrency=UPLOAD_CONCURRENCY,
+            use_threads=True
         )
 
+        # Batch workers prefix their console lines with their job name
+        self._local = threading.local()
+        self._print_lock = threading.Lock()
+
         print(f"✓ Initialized AWS clients in region: {self.region}")
 
+    def _log(self, message='', end='\n'):
+        """Print a console message, prefixed per line inside batch workers"""
+        prefix = getattr(self._local, 'prefix', None)
+        if prefix is None:
+            print(message, end=end)
+            return
+
+        # Whole lines only: '\r' status rewrites would overwrite other workers
+        lines = ''.join(f"{prefix}{line}\n"
+                        for line in message.strip('\n').split('\n'))
+        with self._print_lock:
+            sys.stdout.write(lines)
+            sys.stdout.flush()
+
     def create_bucket(self):
         """Create S3 bucket if it doesn't exist"""
         try:
             self.s3.head_bucket(Bucket=self.bucket_name)
-            print(f"✓ Using existing S3 bucket: {self.bucket_name}")
+            self._log(f"✓ Using existing S3 bucket: {self.bucket_name}")
         except ClientError as e:
             if e.response['Error']['Code'] == '404':
                 try:
@@ -66,44 +255,62 @@ class AudioTranscriber:
                             CreateBucketConfiguration={
                                 'LocationConstraint': self.region}
                         )
-                    print(f"✓ Created S3 bucket: {self.bucket_name}")
+                    self._log(f"✓ Created S3 bucket: {self.bucket_name}")
                 except ClientError as create_error:
-                    print(f"✗ Error creating bucket: {create_error}")
+                    self._log(f"✗ Error creating bucket: {create_error}")
                     raise
             else:
-                print(f"✗ Error checking bucket: {e}")
+                self._log(f"✗ Error checking bucket: {e}")
                 raise
 
-    def upload_file(self, file_path):
-        """Upload audio file to S3"""
+    def upload_file(self, file_path, digest):
+        """Upload audio file to S3 under its content digest"""
         file_name = Path(file_path).name
-        s3_key = f"audio/{file_name}"
+        # Same-named files from different directories get distinct keys
+        s3_key = f"audio/{digest}/{file_name}"
         s3_uri = f"s3://{self.bucket_name}/{s3_key}"
 
         try:
-            print(f"→ Uploading {file_name} to S3...")
-            self.s3.upload_file(file_path, self.bucket_name, s3_key)
-            print(f"✓ Uploaded to: {s3_uri}")
+            self._log(f"→ Uploading {file_name} to S3...")
+            self.s3.upload_file(
+                file_path, self.bucket_name, s3_key,
+                ExtraArgs={'ContentType': 'audio/mpeg'},
+                Config=self.transfer_config
+            )
+            self._log(f"✓ Uploaded to: {s3_uri}")
             return s3_uri
         except ClientError as e:
-            print(f"✗ Error uploading file: {e}")
+            self._log(f"✗ Error uploading file: {e}")
             raise
 
+    def find_existing_job(self, job_name):
+        """
+        Check for a previous job with the same name (same audio content)
+        Returns its status if it can be reused, None if absent or failed
+        """
+        try:
+            response = self.transcribe.get_transcription_job(
+                TranscriptionJobName=job_name)
+        except self.transcribe.exceptions.BadRequestException:
+            # Transcribe reports an unknown job name as a bad request;
+            # throttling and access errors propagate
+            return None
+
+        status = response['TranscriptionJob']['TranscriptionJobStatus']
+        if status == 'FAILED':
+            self._log(f"→ Deleting failed job: {job_name}")
+            self.transcribe.delete_transcription_job(
+                TranscriptionJobName=job_name)
+            time.sleep(2)
+            return None
+
+        self._log(f"✓ Reusing existing job: {job_name} ({status})")
+        return status
+
     def start_transcription(self, s3_uri, job_name):
         """Start AWS Transcribe job with automatic language detection"""
         try:
-            # Delete existing job if it exists
-            try:
-                self.transcribe.get_transcription_job(
-                    TranscriptionJobName=job_name)
-                print(f"→ Deleting existing job: {job_name}")
-                self.transcribe.delete_transcription_job(
-                    TranscriptionJobName=job_name)
-                time.sleep(2)
-            except ClientError:
-                pass
-
-            print(f"→ Starting transcription with auto language detection...")
+            self._log(f"→ Starting transcription with auto language detection...")
 
             # Start transcription with automatic language identification
             self.transcribe.start_transcription_job(
@@ -114,154 +321,262 @@ class AudioTranscriber:
                 LanguageOptions=['en-US', 'uk-UA', 'pl-PL', 'de-DE', 'fr-FR']
             )
 
-            print(f"✓ Transcription job started: {job_name}")
+            self._log(f"✓ Transcription job started: {job_name}")
             return job_name
 
         except ClientError as e:
-            print(f"✗ Error starting transcription: {e}")
+            self._log(f"✗ Error starting transcription: {e}")
             raise
 
+    def _poll_transcription(self, job_name, max_wait=300):
+        """Poll job status with exponential backoff until it leaves the queue"""
+        start_time = time.time()
+        delay = POLL_INITIAL_DELAY
+        last_status = None
+
+        while True:
+            response = self.transcribe.get_transcription_job(
+                TranscriptionJobName=job_name)
+            job = response['TranscriptionJob']
+            status = job['TranscriptionJobStatus']
+            elapsed = time.time() - start_time
+
+            if status not in ['IN_PROGRESS', 'QUEUED']:
+                return job, int(elapsed)
+
+            if elapsed > max_wait:
+                self._log(f"\n✗ Timeout after {int(elapsed)}s")
+                raise Exception("Transcription timeout")
+
+            # Start over with short sleeps whenever the status changes
+            if status != last_status:
+                delay = POLL_INITIAL_DELAY
+                last_status = status
+
+            self._log(f"  Status: {status} ({int(elapsed)}s)...", end='\r')
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX_DELAY)
+
     def wait_for_completion(self, job_name, max_wait=300):
         """Wait for transcription job to complete"""
-        print(f"→ Waiting for completion (max {max_wait}s)...")
+        self._log(f"→ Waiting for completion (max {max_wait}s)...")
 
-        start_time = time.time()
-        while True:
-            try:
-                response = self.transcribe.get_transcription_job(
-                    TranscriptionJobName=job_name)
-                job = response['TranscriptionJob']
-                status = job['TranscriptionJobStatus']
-
-                if status == 'COMPLETED':
-                    elapsed = int(time.time() - start_time)
-                    detected_language = job.get('LanguageCode', 'Unknown')
-                    print(
-                        f"\n✓ Completed in {elapsed}s | Detected language: {detected_language}")
-                    return job
-
-                elif status == 'FAILED':
-                    reason = job.get('FailureReason', 'Unknown')
-                    print(f"\n✗ Transcription failed: {reason}")
-                    raise Exception(f"Transcription failed: {reason}")
-
-                elif status in ['IN_PROGRESS', 'QUEUED']:
-                    elapsed = int(time.time() - start_time)
-                    if elapsed > max_wait:
-                        print(f"\n✗ Timeout after {elapsed}s")
-                        raise Exception("Transcription timeout")
-
-                    print(f"  Status: {status} ({elapsed}s)...", end='\r')
-                    time.sleep(5)
-
-            except ClientError as e:
-                print(f"\n✗ Error checking status: {e}")
-                raise
+        try:
+            job, elapsed = self._poll_transcription(job_name, max_wait)
+        except ClientError as e:
+            self._log(f"\n✗ Error checking status: {e}")
+            raise
 
-    def download_result(self, transcript_uri):
-        """Download transcription result"""
+        status = job['TranscriptionJobStatus']
+        if status == 'COMPLETED':
+            detected_language = job.get('LanguageCode', 'Unknown')
+            self._log(
+                f"\n✓ Completed in {elapsed}s | Detected language: {detected_language}")
+            return job
+
+        reason = job.get('FailureReason', 'Unknown')
+        self._log(f"\n✗ Transcription failed: {reason}")
+        raise Exception(f"Transcription failed: {reason}")
+
+    def download_result(self, transcript_uri, full_json=False, with_items=False):
+        """
+        Download transcription result (transcript summary unless full_json)
+        Returns (result, items) where items holds per-word data column-wise,
+        or None unless with_items is set
+        """
         try:
-            print(f"→ Downloading result...")
-            with urllib.request.urlopen(transcript_uri) as response:
-                result = json.loads(response.read().decode('utf-8'))
-            print(f"✓ Result downloaded")
-            return result
+            self._log(f"→ Downloading result...")
+            with self.http.get(transcript_uri, stream=True) as response:
+                response.raise_for_status()
+                if full_json:
+                    result = response.json()
+                    items = TranscriptItems.from_result(result) if with_items else None
+                else:
+                    response.raw.decode_content = True
+                    items = TranscriptItems() if with_items else None
+                    result = parse_transcript_summary(response.raw, items)
+            if items is not None:
+                self._log(f"✓ Result downloaded ({len(items)} items)")
+            else:
+                self._log(f"✓ Result downloaded")
+            return result, items
         except Exception as e:
-            print(f"✗ Error downloading result: {e}")
+            self._log(f"✗ Error downloading result: {e}")
             raise
 
-    def save_result(self, result, output_file):
+    def save_result(self, result, output_file, full_json=False, items=None):
         """Save transcription to files"""
         try:
             transcript_text = result['results']['transcripts'][0]['transcript']
             language_code = result['results'].get('language_code', 'Unknown')
 
+            # Save per-word items as columns (start/end time, content, confidence, type)
+            if items is not None:
+                items_file = output_file.replace('.txt', '_items.npz')
+                np.savez_compressed(items_file, **items.to_arrays())
+                self._log(f"✓ Saved items: {items_file}")
+
             # Save full JSON
-            json_file = output_file.replace('.txt', '_full.json')
-            with open(json_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            print(f"✓ Saved JSON: {json_file}")
+            if full_json:
+                json_file = output_file.replace('.txt', '_full.json')
+                with open(json_file, 'w', encoding='utf-8') as f:
+                    json.dump(result, f, indent=2, ensure_ascii=False)
+                self._log(f"✓ Saved JSON: {json_file}")
 
             # Save clean transcript
+            report = "".join([
+                "AWS TRANSCRIBE RESULT\n",
+                SEP_EQ + "\n\n",
+                "Transcript:\n",
+                SEP_DASH + "\n",
+                transcript_text + "\n",
+                SEP_DASH + "\n\n",
+                "Metadata:\n",
+                f"Job Name: {result.get('jobName', 'N/A')}\n",
+                f"Status: {result.get('status', 'N/A')}\n",
+                f"Detected Language: {language_code}\n"
+            ])
             with open(output_file, 'w', encoding='utf-8') as f:
-                f.write("AWS TRANSCRIBE RESULT\n")
-                f.write("=" * 60 + "\n\n")
-                f.write("Transcript:\n")
-                f.write("-" * 60 + "\n")
-                f.write(transcript_text + "\n")
-                f.write("-" * 60 + "\n\n")
-                f.write("Metadata:\n")
-                f.write(f"Job Name: {result.get('jobName', 'N/A')}\n")
-                f.write(f"Status: {result.get('status', 'N/A')}\n")
-                f.write(f"Detected Language: {language_code}\n")
-
-            print(f"✓ Saved transcript: {output_file}")
+                f.write(report)
+
+            self._log(f"✓ Saved transcript: {output_file}")
             return transcript_text, language_code
 
         except Exception as e:
-            print(f"✗ Error saving result: {e}")
+            self._log(f"✗ Error saving result: {e}")
             raise
 
-    def transcribe_file(self, audio_file, output_file='transcription.txt'):
+    def transcribe_file(self, audio_file, output_file='transcription.txt',
+                        full_json=False, with_items=False, digest=None,
+                        bucket_ready=False):
         """Main workflow: upload, transcribe, save"""
-        print("\n" + "=" * 60)
-        print("AWS TRANSCRIBE - Audio Transcription")
-        print("=" * 60 + "\n")
+        self._log("\n" + SEP_EQ)
+        self._log("AWS TRANSCRIBE - Audio Transcription")
+        self._log(SEP_EQ + "\n")
 
         try:
-            # Create bucket
-            self.create_bucket()
+            # Job name is derived from file content, so identical audio
+            # reuses the previous transcription instead of re-running it
+            if digest is None:
+                digest = file_sha256(audio_file)[:16]
+            job_name = job_name_for(audio_file, digest)
+
+            if self.find_existing_job(job_name) is None:
+                # Create bucket
+                if not bucket_ready:
+                    self.create_bucket()
 
-            # Upload file
-            s3_uri = self.upload_file(audio_file)
+                # Upload file
+                s3_uri = self.upload_file(audio_file, digest)
 
-            # Start transcription
-            job_name = f"transcribe-{Path(audio_file).stem}-{int(time.time())}"
-            self.start_transcription(s3_uri, job_name)
+                # Start transcription
+                self.start_transcription(s3_uri, job_name)
 
             # Wait for completion
             job_result = self.wait_for_completion(job_name)
 
             # Download result
             transcript_uri = job_result['Transcript']['TranscriptFileUri']
-            result = self.download_result(transcript_uri)
+            result, items = self.download_result(
+                transcript_uri, full_json, with_items)
 
             # Save result
-            transcript, language = self.save_result(result, output_file)
+            transcript, language = self.save_result(
+                result, output_file, full_json, items)
 
             # Show result
-            print("\n" + "=" * 60)
-            print("TRANSCRIPTION COMPLETE")
-            print("=" * 60)
-            print(f"\nDetected Language: {language}")
-            print(f"Transcript:")
-            print("-" * 60)
-            print(transcript[:500] + ("..." if len(transcript) > 500 else ""))
-            print("-" * 60)
+            self._log("\n" + SEP_EQ)
+            self._log("TRANSCRIPTION COMPLETE")
+            self._log(SEP_EQ)
+            self._log(f"\nDetected Language: {language}")
+            self._log(f"Transcript:")
+            self._log(SEP_DASH)
+            self._log(transcript[:500] + ("..." if len(transcript) > 500 else ""))
+            self._log(SEP_DASH)
 
             return True
 
         except Exception as e:
-            print(f"\n✗ Failed: {e}")
+            self._log(f"\n✗ Failed: {e}")
             return False
 
+    def _transcribe_batch_file(self, audio_file, digest, full_json, with_items):
+        """Batch worker: transcribe one file with job-name-prefixed output"""
+        stem = Path(audio_file).stem
+        self._local.prefix = f"[{job_name_for(audio_file, digest)}] "
+        try:
+            return self.transcribe_file(
+                audio_file, f"{stem}-{digest}_transcription.txt", full_json,
+                with_items, digest=digest, bucket_ready=True)
+        finally:
+            self._local.prefix = None
+
+    def transcribe_files(self, audio_files, full_json=False, with_items=False,
+                         max_workers=MAX_BATCH_WORKERS):
+        """
+        Transcribe several files concurrently (at most max_workers at once)
+        Each result is saved to <audio stem>-<content digest>_transcription.txt
+        """
+        if not audio_files:
+            return []
+
+        # Create the bucket up front so workers don't race to create it
+        self.create_bucket()
+
+        # Workers spend their time in boto3 HTTP calls and polling sleeps,
+        # which release the GIL, so jobs wait on Transcribe in parallel
+        workers = max(1, min(len(audio_files), max_workers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            digests = [digest[:16] for digest in
+                       executor.map(file_sha256, audio_files)]
+
+            # Inputs with the same stem and content (e.g. a/x.mp3 and b/x.mp3)
+            # share a job name and output file, so each job runs only once
+            jobs = {}
+            for audio_file, digest in zip(audio_files, digests):
+                jobs.setdefault(job_name_for(audio_file, digest),
+                                (audio_file, digest))
+
+            files, file_digests = zip(*jobs.values())
+            results = dict(zip(jobs, executor.map(
+                self._transcribe_batch_file, files, file_digests,
+                [full_json] * len(jobs), [with_items] * len(jobs))))
+
+        return [results[job_name_for(audio_file, digest)]
+                for audio_file, digest in zip(audio_files, digests)]
+
 
 def main():
     """Entry point"""
-    if len(sys.argv) < 2:
-        print("Usage: python transcribe_audio.py <audio_file> [output_file]")
+    full_json = '--full-json' in sys.argv
+    with_items = '--items' in sys.argv
+    batch = '--batch' in sys.argv
+    args = [arg for arg in sys.argv[1:]
+            if arg not in ('--full-json', '--items', '--batch')]
+
+    if len(args) < 1:
+        print(
+            "Usage: python transcribe_audio.py <audio_file> [output_file] [--full-json] [--items]")
+        print(
+            "       python transcribe_audio.py --batch <audio_file> [<audio_file> ...] [--full-json] [--items]")
         print("Example: python transcribe_audio.py lab_2.mp3")
         sys.exit(1)
 
-    audio_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else 'transcription.txt'
-
-    if not os.path.exists(audio_file):
-        print(f"Error: Audio file not found: {audio_file}")
-        sys.exit(1)
+    audio_files = args if batch else args[:1]
+    for audio_file in audio_files:
+        if not os.path.exists(audio_file):
+            print(f"Error: Audio file not found: {audio_file}")
+            sys.exit(1)
 
     transcriber = AudioTranscriber()
-    success = transcriber.transcribe_file(audio_file, output_file)
+
+    if batch:
+        results = transcriber.transcribe_files(audio_files, full_json, with_items)
+        sys.exit(0 if all(results) else 1)
+
+    output_file = args[1] if len(args) > 1 else 'transcription.txt'
+    success = transcriber.transcribe_file(
+        audio_files[0], output_file, full_json, with_items)
 
     sys.exit(0 if success else 1)
 
@@ -5,13 +5,21 @@ Transcribes audio, detects language, analyzes sentiment, searches phrases, and e
 """
 
 import os
+import re
 import sys
 import time
 import json
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import ijson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from langdetect import detect_langs
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
@@ -26,45 +34,156 @@ AWS_SECRET_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 AWS_REGION = os.getenv('AWS_DEFAULT_REGION', 'eu-west-1')
 BUCKET_NAME = 'media-labs-audio-transcribe'
 
+# Console separator
+SEP_EQ = "=" * 60
+
+# Long-lived client settings: pooled keep-alive connections, adaptive retries
+BOTO_CONFIG = Config(
+    max_pool_connections=32,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=60
+)
+
+# HTTP connection pool for downloading Transcribe results
+HTTP_POOL_SIZE = 16
+
+# S3 multipart upload settings
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB
+UPLOAD_CONCURRENCY = 16
+
+# spaCy model (only tokenizer and NER are used)
+SPACY_MODEL = 'en_core_web_sm'
+SPACY_DISABLED = ['tagger', 'parser', 'attribute_ruler', 'lemmatizer']
+
+# Transcription status polling (exponential backoff)
+POLL_INITIAL_DELAY = 1  # seconds
+POLL_MAX_DELAY = 15  # seconds
+
+
+def parse_transcript_summary(stream):
+    """
+    Stream-parse a Transcribe result JSON keeping only transcript and metadata
+    Per-word 'items' are skipped without being loaded into memory
+    """
+    summary = {}
+    transcript = None
+    language_code = None
+
+    for prefix, event, value in ijson.parse(stream):
+        if event != 'string':
+            continue
+        if prefix == 'results.transcripts.item.transcript' and transcript is None:
+            transcript = value
+        elif prefix == 'results.language_code':
+            language_code = value
+        elif prefix in ('jobName', 'status'):
+            summary[prefix] = value
+
+    results = {'transcripts': [{'transcript': transcript or ''}]}
+    if language_code:
+        results['language_code'] = language_code
+    summary['results'] = results
+    return summary
+
+
+def compile_phrase(phrase):
+    """Compile a case-insensitive literal search pattern for a phrase"""
+    return re.compile(re.escape(phrase), re.IGNORECASE)
+
+
+_VADER_READY = False
+_BUCKET_READY = False
+
+
+def _bootstrap():
+    """Download NLTK data if needed (runs once at import)"""
+    global _VADER_READY
+    if _VADER_READY:
+        return
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        print("Downloading NLTK vader_lexicon...")
+        nltk.download('vader_lexicon', quiet=True)
+    _VADER_READY = True
+
+
+_bootstrap()
+
+_sia = None
+
+
+def get_sentiment_analyzer():
+    """Create the VADER analyzer once per process"""
+    global _sia
+    if _sia is None:
+        _sia = SentimentIntensityAnalyzer()
+    return _sia
+
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """Load the spaCy model once per process, with unused components disabled"""
+    global _nlp
+    with _nlp_lock:
+        if _nlp is None:
+            print("Loading spaCy model...")
+            _nlp = spacy.load(SPACY_MODEL, disable=SPACY_DISABLED)
+    return _nlp
+
 
 class AudioAnalyzer:
     """Analyzes audio files using AWS Transcribe and NLP tools"""
 
     def __init__(self):
         """Initialize AWS clients and NLP models"""
-        # AWS clients
-        self.s3 = boto3.client(
-            's3',
+        # AWS clients (one shared session)
+        self.session = boto3.session.Session(
             region_name=AWS_REGION,
             aws_access_key_id=AWS_ACCESS_KEY,
             aws_secret_access_key=AWS_SECRET_KEY
         )
-        self.transcribe = boto3.client(
-            'transcribe',
-            region_name=AWS_REGION,
-            aws_access_key_id=AWS_ACCESS_KEY,
-            aws_secret_access_key=AWS_SECRET_KEY
+        self.s3 = self.session.client('s3', config=BOTO_CONFIG)
+        self.transcribe = self.session.client('transcribe', config=BOTO_CONFIG)
+        self.http = requests.Session()
+        self.http.mount('https://', HTTPAdapter(
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.5)
+        ))
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+            max_concurrency=UPLOAD_CONCURRENCY,
+            use_threads=True
         )
 
-        # Download NLTK data if needed
-        try:
-            nltk.data.find('sentiment/vader_lexicon.zip')
-        except LookupError:
-            print("Downloading NLTK vader_lexicon...")
-            nltk.download('vader_lexicon', quiet=True)
-
         # Initialize sentiment analyzer
-        self.sia = SentimentIntensityAnalyzer()
+        self.sia = get_sentiment_analyzer()
 
-        # Load spaCy model
-        print("Loading spaCy model...")
-        self.nlp = spacy.load('en_core_web_sm')
+        # Load spaCy model in the background while S3 and Transcribe work runs
+        loader = ThreadPoolExecutor(max_workers=1)
+        self._nlp_future = loader.submit(get_nlp)
+        loader.shutdown(wait=False)
 
         # Ensure bucket exists
         self._ensure_bucket()
 
+    @property
+    def nlp(self):
+        """spaCy pipeline, waits for the background load if still running"""
+        return self._nlp_future.result()
+
     def _ensure_bucket(self):
-        """Create S3 bucket if it doesn't exist"""
+        """Create S3 bucket if it doesn't exist (checked once per process)"""
+        global _BUCKET_READY
+        if _BUCKET_READY:
+            return
         try:
             self.s3.head_bucket(Bucket=BUCKET_NAME)
             print(f"Using existing bucket: {BUCKET_NAME}")
@@ -78,11 +197,12 @@ class AudioAnalyzer:
                     CreateBucketConfiguration={
                         'LocationConstraint': AWS_REGION}
                 )
+        _BUCKET_READY = True
 
-    def transcribe_audio(self, file_path):
+    def transcribe_audio(self, file_path, full_json=False):
         """Transcribe audio file using AWS Transcribe"""
         print(f"\n1) TRANSCRIPTION")
-        print("=" * 60)
+        print(SEP_EQ)
 
         # Upload to S3
         filename = os.path.basename(file_path)
@@ -90,7 +210,11 @@ class AudioAnalyzer:
         s3_uri = f's3://{BUCKET_NAME}/{s3_key}'
 
         print(f"Uploading {filename} to S3...")
-        self.s3.upload_file(file_path, BUCKET_NAME, s3_key)
+        self.s3.upload_file(
+            file_path, BUCKET_NAME, s3_key,
+            ExtraArgs={'ContentType': 'audio/wav'},
+            Config=self.transfer_config
+        )
         print(f"Uploaded to: {s3_uri}")
 
         # Start transcription job
@@ -107,25 +231,22 @@ class AudioAnalyzer:
 
         # Wait for completion
         print("Waiting for transcription to complete", end='')
-        while True:
-            status = self.transcribe.get_transcription_job(
-                TranscriptionJobName=job_name)
-            job_status = status['TranscriptionJob']['TranscriptionJobStatus']
+        job = self._poll_transcription(job_name)
 
-            if job_status == 'COMPLETED':
-                print(" Done!")
-                break
-            elif job_status == 'FAILED':
-                print(" Failed!")
-                raise Exception("Transcription job failed")
-
-            print('.', end='', flush=True)
-            time.sleep(5)
+        if job['TranscriptionJobStatus'] == 'FAILED':
+            print(" Failed!")
+            raise Exception("Transcription job failed")
+        print(" Done!")
 
         # Get results
-        result_uri = status['TranscriptionJob']['Transcript']['TranscriptFileUri']
-        response = requests.get(result_uri)
-        result = response.json()
+        result_uri = job['Transcript']['TranscriptFileUri']
+        with self.http.get(result_uri, stream=True) as response:
+            response.raise_for_status()
+            if full_json:
+                result = response.json()
+            else:
+                response.raw.decode_content = True
+                result = parse_transcript_summary(response.raw)
 
         transcript = result['results']['transcripts'][0]['transcript']
         detected_lang = result['results'].get('language_code', 'unknown')
@@ -135,10 +256,33 @@ class AudioAnalyzer:
 
         return transcript, result
 
+    def _poll_transcription(self, job_name):
+        """Poll job status with exponential backoff until it leaves the queue"""
+        delay = POLL_INITIAL_DELAY
+        last_status = None
+
+        while True:
+            response = self.transcribe.get_transcription_job(
+                TranscriptionJobName=job_name)
+            job = response['TranscriptionJob']
+            status = job['TranscriptionJobStatus']
+
+            if status not in ['IN_PROGRESS', 'QUEUED']:
+                return job
+
+            # Start over with short sleeps whenever the status changes
+            if status != last_status:
+                delay = POLL_INITIAL_DELAY
+                last_status = status
+
+            print('.', end='', flush=True)
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX_DELAY)
+
     def detect_language(self, text):
         """Detect language using langdetect"""
         print(f"\n2) LANGUAGE DETECTION")
-        print("=" * 60)
+        print(SEP_EQ)
 
         # Get language with confidence
         langs = detect_langs(text)
@@ -158,7 +302,7 @@ class AudioAnalyzer:
     def analyze_sentiment(self, text):
         """Analyze sentiment using NLTK VADER"""
         print(f"\n3) SENTIMENT ANALYSIS")
-        print("=" * 60)
+        print(SEP_EQ)
 
         scores = self.sia.polarity_scores(text)
 
@@ -177,20 +321,23 @@ class AudioAnalyzer:
         return sentiment, scores
 
     def search_phrase_and_ner(self, text, phrase):
-        """Search for phrase and extract named entities"""
+        """
+        Search for phrase and extract named entities
+        Returns (entities, phrase_position) - position is None if not found
+        """
         print(f"\n4) PHRASE SEARCH & NAMED ENTITY RECOGNITION")
-        print("=" * 60)
+        print(SEP_EQ)
 
-        # Search for phrase
-        phrase_lower = phrase.lower()
-        text_lower = text.lower()
+        # Search for phrase (case-insensitive, without lowercased copies)
+        match = compile_phrase(phrase).search(text)
 
-        if phrase_lower in text_lower:
-            position = text_lower.index(phrase_lower)
+        if match:
+            position = match.start()
             print(f"Phrase Found at position: {position}")
             print(
-                f"Context: ...{text[max(0, position-20):position+len(phrase)+20]}...")
+                f"Context: ...{text[max(0, position-20):match.end()+20]}...")
         else:
+            position = None
             print(f"Phrase Not found: '{phrase}'")
 
         # Named Entity Recognition
@@ -204,19 +351,20 @@ class AudioAnalyzer:
         else:
             print("  No named entities found")
 
-        return entities
+        return entities, position
 
-    def analyze(self, audio_file, phrase=None):
+    def analyze(self, audio_file, phrase=None, full_json=False):
         """Full analysis pipeline"""
-        print("\n" + "=" * 60)
+        print("\n" + SEP_EQ)
         print("AUDIO ANALYSIS PIPELINE")
-        print("=" * 60)
+        print(SEP_EQ)
         print(f"Audio file: {audio_file}")
         if phrase:
             print(f"Search phrase: {phrase}")
 
         # 1. Transcription
-        transcript, transcribe_result = self.transcribe_audio(audio_file)
+        transcript, transcribe_result = self.transcribe_audio(
+            audio_file, full_json)
 
         # 2. Language detection
         language, confidence = self.detect_language(transcript)
@@ -225,20 +373,19 @@ class AudioAnalyzer:
         sentiment, scores = self.analyze_sentiment(transcript)
 
         # 4. Phrase search and NER
-        entities = self.search_phrase_and_ner(
-            transcript, phrase) if phrase else []
+        entities, phrase_position = self.search_phrase_and_ner(
+            transcript, phrase) if phrase else ([], None)
 
         # Summary
-        print("\n" + "=" * 60)
+        print("\n" + SEP_EQ)
         print("SUMMARY")
-        print("=" * 60)
+        print(SEP_EQ)
         print(f"Transcription: {transcript}")
         print(f"Language: {language}")
         print(f"Sentiment: {sentiment}")
         if phrase:
-            if phrase.lower() in transcript.lower():
-                position = transcript.lower().index(phrase.lower())
-                print(f"Phrase Found at position: {position}")
+            if phrase_position is not None:
+                print(f"Phrase Found at position: {phrase_position}")
             else:
                 print(f"Phrase Not found")
         print(
@@ -251,6 +398,7 @@ class AudioAnalyzer:
             'sentiment': sentiment,
             'sentiment_scores': scores,
             'entities': entities,
+            'phrase_position': phrase_position,
             'transcribe_result': transcribe_result
         }
 
@@ -263,6 +411,8 @@ def main():
                         help='Path to WAV audio file')
     parser.add_argument(
         '--phrase', help='Phrase to search for in transcription')
+    parser.add_argument('--full-json', action='store_true',
+                        help='Keep the full Transcribe JSON (per-word items) in the saved result')
 
     args = parser.parse_args()
 
@@ -273,7 +423,7 @@ def main():
 
     # Run analysis
     analyzer = AudioAnalyzer()
-    result = analyzer.analyze(args.audio_source, args.phrase)
+    result = analyzer.analyze(args.audio_source, args.phrase, args.full_json)
 
     # Save results
     output_file = 'analysis_result.json'
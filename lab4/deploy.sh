@@ -60,6 +60,15 @@ echo ""
 echo "Deploying infrastructure..."
 sam deploy --resolve-s3
 
+# Multipart uploads that are never completed or aborted keep their parts
+# (and their storage cost); let S3 remove them a day after they start.
+# Note: this replaces any other lifecycle rules on the bucket.
+echo ""
+echo "Configuring bucket lifecycle..."
+aws s3api put-bucket-lifecycle-configuration \
+    --bucket media-labs-audio-transcribe \
+    --lifecycle-configuration '{"Rules": [{"ID": "abort-incomplete-api-uploads", "Status": "Enabled", "Filter": {"Prefix": "api-uploads/"}, "AbortIncompleteMultipartUpload": {"DaysAfterInitiation": 1}}]}'
+
 # Get API endpoint
 echo ""
 echo "Retrieving API endpoint..."
@@ -80,8 +89,8 @@ echo "Saved to: api_endpoint.txt"
 echo ""
 echo "Test with:"
 echo "  curl -X POST $API_ENDPOINT \\"
-echo "    -H \"Content-Type: audio/wav\" \\"
-echo "    --data-binary \"@../lab3/lab3.wav\""
+echo "    -H \"Content-Type: application/json\" \\"
+echo "    -d '{\"s3_uri\": \"s3://media-labs-audio-transcribe/audio/lab3.wav\"}'"
 echo ""
 echo "Or run: python test_api.py"
 echo ""
@@ -1,113 +1,396 @@
 """
 AWS Lambda Function for Audio Transcription API
-Handles binary file upload and S3 URI references
+Issues pre-signed S3 uploads and starts transcription from S3 URI references
+on_complete publishes finished jobs to SNS (EventBridge-triggered)
 """
 
 import json
+import logging
 import boto3
-import base64
+import math
+import re
+import time
 import uuid
 import os
+from urllib.parse import urlparse, unquote
 from urllib.request import urlopen
-
-# Initialize AWS clients
-s3 = boto3.client('s3')
-transcribe = boto3.client('transcribe')
+import ijson
+import orjson
+from botocore.config import Config
+
+# Records propagate to the CloudWatch handler Lambda attaches to the root
+# logger; a module logger keeps LOG_LEVEL=DEBUG from enabling botocore's
+# debug output (DEBUG logs a one-line summary of every request)
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+# Initialize AWS clients once per container, reused across warm invocations
+# (keep-alive connection pool, adaptive retries against throttling).
+# botocore always sets TCP_NODELAY on its sockets; tcp_keepalive adds SO_KEEPALIVE
+_cfg = Config(
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    tcp_keepalive=True,
+    max_pool_connections=20,
+    connect_timeout=2,
+    read_timeout=10
+)
+s3 = boto3.client('s3', config=_cfg)
+transcribe = boto3.client('transcribe', config=_cfg)
+
+# Completion notifications (set only on the EventBridge-triggered function)
+TOPIC_ARN = os.environ.get('TOPIC_ARN')
+sns = boto3.client('sns', config=_cfg) if TOPIC_ARN else None
 
 # Configuration
 BUCKET_NAME = os.environ.get('BUCKET_NAME', 'media-labs-audio-transcribe')
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+PRESIGN_EXPIRES = 900  # seconds
+UPLOAD_PREFIX = 'api-uploads/'
+MULTIPART_PART_SIZE = 8 * 1024 * 1024  # S3 minimum is 5MB (except last part)
+MAX_UPLOAD_PARTS = 1000  # bounds the response size (S3 allows 10000)
+MAX_MULTIPART_SIZE = MULTIPART_PART_SIZE * MAX_UPLOAD_PARTS
+TRANSCRIPT_PREFIX = 'transcripts/'
+
+# Terminal (COMPLETED/FAILED) status responses are cached in the container's
+# /tmp, so repeated polls of a finished job make no AWS calls
+JOB_CACHE_DIR = '/tmp/transcribe-jobs'
+JOB_CACHE_TTL = 3600  # seconds
+JOB_NAME_PATTERN = re.compile(r'[0-9a-zA-Z._-]{1,200}')
+
+# Names of jobs started by POST /transcribe (transcribe-<uuid4>)
+API_JOB_NAME_PATTERN = re.compile(
+    r'transcribe-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+# Media type at the start of a Content-Type value (parameters ignored);
+# the lookahead stops application/jsonp etc. from matching as JSON
+CONTENT_TYPE_PATTERN = re.compile(
+    r'\s*(audio/[a-z0-9+.\-]+|application/json)(?=\s*(;|$))', re.IGNORECASE)
 SUPPORTED_LANGUAGES = ['en-US', 'uk-UA', 'pl-PL', 'de-DE', 'fr-FR']
 
+# Content-Type -> file extension
+CONTENT_TYPE_EXTENSIONS = {
+    'audio/wav': 'wav',
+    'audio/wave': 'wav',
+    'audio/x-wav': 'wav',
+    'audio/mpeg': 'mp3',
+    'audio/mp3': 'mp3',
+    'audio/mp4': 'mp4',
+    'audio/flac': 'flac',
+    'audio/ogg': 'ogg',
+    'audio/webm': 'webm'
+}
+
+# File extension -> Transcribe MediaFormat
+MEDIA_FORMATS = {
+    'mp3': 'mp3',
+    'wav': 'wav',
+    'mp4': 'mp4',
+    'flac': 'flac',
+    'ogg': 'ogg',
+    'webm': 'webm'
+}
+
 
 def lambda_handler(event, context):
     """
     Main Lambda handler
-    Routes to POST (start job) or GET (check status)
+    Routes to POST /presign (upload URL), POST /upload/init,
+    POST /upload/complete and POST /upload/abort (multipart upload),
+    POST /transcribe (start job) or GET /transcribe/{job_name} (check status)
     """
-    print(f"Event: {json.dumps(event)}")
-
     method = event.get('httpMethod', 'POST')
+    resource = event.get('resource') or event.get('path') or ''
+
+    # Never serialize the whole event (headers, request context, body)
+    headers = event.get('headers') or {}
+    logger.debug("method=%s path=%s ct=%s", method, event.get('path'),
+                 headers.get('content-type', headers.get('Content-Type')))
 
     if method == 'GET':
         return handle_status_check(event)
+    elif method == 'POST' and resource.endswith('/presign'):
+        return handle_presign(event)
+    elif method == 'POST' and resource.endswith('/upload/init'):
+        return handle_upload_init(event)
+    elif method == 'POST' and resource.endswith('/upload/complete'):
+        return handle_upload_complete(event)
+    elif method == 'POST' and resource.endswith('/upload/abort'):
+        return handle_upload_abort(event)
     elif method == 'POST':
         return handle_start_transcription(event)
     else:
         return response(405, {'error': 'Method not allowed'})
 
 
-def handle_start_transcription(event):
+def handle_presign(event):
     """
-    Start transcription job and return immediately
-    Accepts: binary upload or S3 URI
+    Create a pre-signed S3 POST for uploading audio directly to S3
+    Body (optional JSON): {"content_type": "audio/wav"}
     """
     try:
-        headers = event.get('headers', {})
-        content_type = headers.get(
-            'content-type', headers.get('Content-Type', ''))
+        body = json.loads(event.get('body') or '{}')
+        content_type = body.get('content_type', 'audio/wav')
 
-        s3_uri = None
+        mime_type = parse_content_type(content_type)
+        if not mime_type.startswith('audio/'):
+            return response(400, {
+                'error': 'Invalid content_type',
+                'message': 'content_type must be audio/*'
+            })
 
-        # Option 1: Binary file upload
-        if 'audio/' in content_type.lower():
-            # Decode binary data
-            body = event.get('body', '')
-            if event.get('isBase64Encoded', False):
-                audio_data = base64.b64decode(body)
-            else:
-                audio_data = body.encode(
-                    'utf-8') if isinstance(body, str) else body
-
-            # Validate file size
-            if len(audio_data) > MAX_FILE_SIZE:
-                return response(413, {
-                    'error': 'File too large',
-                    'message': f'Maximum file size is {MAX_FILE_SIZE / 1024 / 1024}MB. Use S3 URI for larger files.'
-                })
-
-            # Determine file extension from content-type
-            ext = get_extension_from_content_type(content_type)
-            filename = f'upload-{uuid.uuid4()}.{ext}'
-            s3_key = f'api-uploads/{filename}'
-
-            # Upload to S3
-            s3.put_object(
-                Bucket=BUCKET_NAME,
-                Key=s3_key,
-                Body=audio_data,
-                ContentType=content_type
+        ext = CONTENT_TYPE_EXTENSIONS.get(mime_type, 'wav')
+        s3_key = f'{UPLOAD_PREFIX}upload-{uuid.uuid4()}.{ext}'
+
+        presigned = s3.generate_presigned_post(
+            Bucket=BUCKET_NAME,
+            Key=s3_key,
+            Fields={'Content-Type': content_type},
+            Conditions=[
+                {'Content-Type': content_type},
+                ['content-length-range', 0, MAX_FILE_SIZE]
+            ],
+            ExpiresIn=PRESIGN_EXPIRES
+        )
+
+        s3_uri = f's3://{BUCKET_NAME}/{s3_key}'
+        logger.info("Issued upload URL for: %s", s3_uri)
+
+        return response(200, {
+            'upload_url': presigned['url'],
+            'fields': presigned['fields'],
+            's3_uri': s3_uri,
+            'expires_in': PRESIGN_EXPIRES,
+            'message': 'Upload the file as multipart/form-data with these fields, then POST {"s3_uri": ...} to /transcribe'
+        })
+
+    except Exception as e:
+        logger.error("Error: %s", e)
+        return response(500, {
+            'error': 'Internal server error',
+            'message': str(e)
+        })
+
+
+def handle_upload_init(event):
+    """
+    Start an S3 multipart upload and pre-sign a PUT URL for every part
+    Body (JSON): {"size": <bytes>, "content_type": "audio/wav"}
+    Parts can be uploaded in parallel, then POST /upload/complete
+    (or POST /upload/abort to discard the stored parts)
+    """
+    try:
+        body = json.loads(event.get('body') or '{}')
+        content_type = body.get('content_type', 'audio/wav')
+        size = body.get('size')
+
+        mime_type = parse_content_type(content_type)
+        if not mime_type.startswith('audio/'):
+            return response(400, {
+                'error': 'Invalid content_type',
+                'message': 'content_type must be audio/*'
+            })
+
+        if not isinstance(size, int) or not 0 < size <= MAX_MULTIPART_SIZE:
+            return response(400, {
+                'error': 'Invalid size',
+                'message': f'size must be 1..{MAX_MULTIPART_SIZE} bytes'
+            })
+
+        ext = CONTENT_TYPE_EXTENSIONS.get(mime_type, 'wav')
+        s3_key = f'{UPLOAD_PREFIX}upload-{uuid.uuid4()}.{ext}'
+
+        upload = s3.create_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=s3_key,
+            ContentType=content_type
+        )
+        upload_id = upload['UploadId']
+
+        part_count = math.ceil(size / MULTIPART_PART_SIZE)
+        part_urls = [
+            s3.generate_presigned_url(
+                'upload_part',
+                Params={
+                    'Bucket': BUCKET_NAME,
+                    'Key': s3_key,
+                    'UploadId': upload_id,
+                    'PartNumber': part_number
+                },
+                ExpiresIn=PRESIGN_EXPIRES
             )
+            for part_number in range(1, part_count + 1)
+        ]
+
+        s3_uri = f's3://{BUCKET_NAME}/{s3_key}'
+        logger.info("Started multipart upload (%d parts) for: %s",
+                    part_count, s3_uri)
+
+        return response(200, {
+            'upload_id': upload_id,
+            's3_uri': s3_uri,
+            'part_size': MULTIPART_PART_SIZE,
+            'part_urls': part_urls,
+            'expires_in': PRESIGN_EXPIRES,
+            'message': 'PUT each part to its URL, then POST {"s3_uri", "upload_id", "parts": [{"part_number", "etag"}]} to /upload/complete, or {"s3_uri", "upload_id"} to /upload/abort on failure'
+        })
+
+    except Exception as e:
+        logger.error("Error: %s", e)
+        return response(500, {
+            'error': 'Internal server error',
+            'message': str(e)
+        })
+
+
+def handle_upload_complete(event):
+    """
+    Complete a multipart upload started by POST /upload/init
+    Body (JSON): {"s3_uri": ..., "upload_id": ...,
+                  "parts": [{"part_number": 1, "etag": "..."}, ...]}
+    """
+    try:
+        body = json.loads(event.get('body') or '{}')
+        s3_uri = body.get('s3_uri') or ''
+        upload_id = body.get('upload_id')
+        parts = body.get('parts') or []
+
+        s3_key = upload_key(s3_uri)
+        if s3_key is None:
+            return response(400, {
+                'error': 'Invalid S3 URI',
+                'message': 'Use the s3_uri returned by /upload/init'
+            })
+
+        if not upload_id or not parts:
+            return response(400, {
+                'error': 'Missing upload_id or parts',
+                'message': 'Provide upload_id and the ETag of every part'
+            })
+
+        s3.complete_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=s3_key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': sorted(
+                ({'PartNumber': int(part['part_number']), 'ETag': part['etag']}
+                 for part in parts),
+                key=lambda part: part['PartNumber']
+            )}
+        )
+
+        logger.info("Completed multipart upload: %s", s3_uri)
+
+        return response(200, {
+            's3_uri': s3_uri,
+            'message': 'Upload complete. POST {"s3_uri": ...} to /transcribe'
+        })
+
+    except (KeyError, TypeError, ValueError) as e:
+        return response(400, {
+            'error': 'Invalid parts',
+            'message': f'Each part needs part_number and etag: {e}'
+        })
+
+    except s3.exceptions.NoSuchUpload:
+        return response(404, {
+            'error': 'Upload not found',
+            'message': f'No multipart upload with id: {upload_id}'
+        })
+
+    except Exception as e:
+        logger.error("Error: %s", e)
+        return response(500, {
+            'error': 'Internal server error',
+            'message': str(e)
+        })
+
 
-            s3_uri = f's3://{BUCKET_NAME}/{s3_key}'
-            print(f"Uploaded to: {s3_uri}")
+def handle_upload_abort(event):
+    """
+    Abort a multipart upload started by POST /upload/init
+    Body (JSON): {"s3_uri": ..., "upload_id": ...}
+    S3 deletes the parts uploaded so far (they are billed until then)
+    """
+    try:
+        body = json.loads(event.get('body') or '{}')
+        s3_uri = body.get('s3_uri') or ''
+        upload_id = body.get('upload_id')
+
+        s3_key = upload_key(s3_uri)
+        if s3_key is None:
+            return response(400, {
+                'error': 'Invalid S3 URI',
+                'message': 'Use the s3_uri returned by /upload/init'
+            })
 
-        # Option 2: S3 URI provided
-        elif 'application/json' in content_type.lower():
-            body = json.loads(event.get('body', '{}'))
-            s3_uri = body.get('s3_uri')
+        if not upload_id:
+            return response(400, {
+                'error': 'Missing upload_id',
+                'message': 'Provide the upload_id returned by /upload/init'
+            })
+
+        s3.abort_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=s3_key,
+            UploadId=upload_id
+        )
 
-            if not s3_uri:
-                return response(400, {
-                    'error': 'Missing s3_uri',
-                    'message': 'Provide s3_uri in JSON body'
-                })
+        logger.info("Aborted multipart upload: %s", s3_uri)
+
+        return response(200, {
+            's3_uri': s3_uri,
+            'message': 'Upload aborted'
+        })
+
+    except s3.exceptions.NoSuchUpload:
+        return response(404, {
+            'error': 'Upload not found',
+            'message': f'No multipart upload with id: {upload_id}'
+        })
+
+    except Exception as e:
+        logger.error("Error: %s", e)
+        return response(500, {
+            'error': 'Internal server error',
+            'message': str(e)
+        })
 
-            # Validate S3 URI format
-            if not s3_uri.startswith('s3://'):
-                return response(400, {
-                    'error': 'Invalid S3 URI',
-                    'message': 'S3 URI must start with s3://'
-                })
 
-            print(f"Using S3 URI: {s3_uri}")
+def handle_start_transcription(event):
+    """
+    Start transcription job and return immediately
+    Accepts: JSON body with S3 URI (upload via POST /presign or
+    /upload/init first)
+    """
+    try:
+        headers = event.get('headers') or {}
+        content_type = headers.get(
+            'content-type', headers.get('Content-Type', ''))
 
-        else:
+        if parse_content_type(content_type) != 'application/json':
             return response(400, {
                 'error': 'Invalid Content-Type',
-                'message': 'Use Content-Type: audio/* for file upload or application/json for S3 URI'
+                'message': 'Use Content-Type: application/json with {"s3_uri": ...}. Get an upload URL from POST /presign first'
             })
 
+        body = json.loads(event.get('body') or '{}')
+        s3_uri = body.get('s3_uri')
+
+        if not s3_uri:
+            return response(400, {
+                'error': 'Missing s3_uri',
+                'message': 'Provide s3_uri in JSON body'
+            })
+
+        # Validate S3 URI format
+        if not s3_uri.startswith('s3://'):
+            return response(400, {
+                'error': 'Invalid S3 URI',
+                'message': 'S3 URI must start with s3://'
+            })
+
+        logger.info("Using S3 URI: %s", s3_uri)
+
         # Determine media format from URI
         media_format = get_media_format(s3_uri)
 
@@ -119,10 +402,13 @@ def handle_start_transcription(event):
             Media={'MediaFileUri': s3_uri},
             MediaFormat=media_format,
             IdentifyLanguage=True,
-            LanguageOptions=SUPPORTED_LANGUAGES
+            LanguageOptions=SUPPORTED_LANGUAGES,
+            # Keep results in our bucket so they can be streamed with GetObject
+            OutputBucketName=BUCKET_NAME,
+            OutputKey=TRANSCRIPT_PREFIX
         )
 
-        print(f"Started transcription job: {job_name}")
+        logger.info("Started transcription job: %s", job_name)
 
         # Return immediately (don't wait for completion)
         return response(202, {
@@ -133,7 +419,7 @@ def handle_start_transcription(event):
         })
 
     except Exception as e:
-        print(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         return response(500, {
             'error': 'Internal server error',
             'message': str(e)
@@ -156,6 +442,10 @@ def handle_status_check(event):
                 'message': 'Provide job_name in path'
             })
 
+        cached = read_cached_status(job_name)
+        if cached is not None:
+            return response(*cached)
+
         # Get job status
         job = transcribe.get_transcription_job(TranscriptionJobName=job_name)
         job_data = job['TranscriptionJob']
@@ -164,27 +454,37 @@ def handle_status_check(event):
         if status == 'COMPLETED':
             # Get transcript
             transcript_uri = job_data['Transcript']['TranscriptFileUri']
+            bucket, key = parse_s3_url(transcript_uri)
 
-            with urlopen(transcript_uri) as response_data:
-                result = json.loads(response_data.read())
-
-            transcript = result['results']['transcripts'][0]['transcript']
-            language = result['results'].get('language_code', 'unknown')
+            # Stream from our bucket via the pooled client; older jobs kept
+            # in the Transcribe-managed bucket are streamed over HTTPS
+            if bucket == BUCKET_NAME:
+                transcript, language = read_s3_transcript(bucket, key)
+            else:
+                body = urlopen(transcript_uri)
+                try:
+                    transcript, language = read_transcript_summary(body)
+                finally:
+                    body.close()
 
-            return response(200, {
+            result = {
                 'status': 'completed',
                 'job_name': job_name,
                 'transcript': transcript,
                 'language': language
-            })
+            }
+            cache_status(job_name, 200, result)
+            return response(200, result)
 
         elif status == 'FAILED':
             failure_reason = job_data.get('FailureReason', 'Unknown error')
-            return response(500, {
+            result = {
                 'status': 'failed',
                 'job_name': job_name,
                 'error': failure_reason
-            })
+            }
+            cache_status(job_name, 500, result)
+            return response(500, result)
 
         else:  # IN_PROGRESS or QUEUED
             return response(202, {
@@ -200,41 +500,174 @@ def handle_status_check(event):
         })
 
     except Exception as e:
-        print(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         return response(500, {
             'error': 'Internal server error',
             'message': str(e)
         })
 
 
-def get_extension_from_content_type(content_type):
-    """Extract file extension from Content-Type header"""
-    type_map = {
-        'audio/wav': 'wav',
-        'audio/wave': 'wav',
-        'audio/x-wav': 'wav',
-        'audio/mpeg': 'mp3',
-        'audio/mp3': 'mp3',
-        'audio/mp4': 'mp4',
-        'audio/flac': 'flac',
-        'audio/ogg': 'ogg',
-        'audio/webm': 'webm'
-    }
-    return type_map.get(content_type.lower(), 'wav')
+def on_complete(event, context):
+    """
+    EventBridge handler for "Transcribe Job State Change" (COMPLETED/FAILED)
+    Publishes the same body GET /transcribe/{job_name} returns to the SNS
+    topic, so clients don't have to poll
+    """
+    if sns is None:
+        raise RuntimeError("TOPIC_ARN is not set, cannot publish notifications")
+
+    detail = event.get('detail') or {}
+    job_name = detail.get('TranscriptionJobName') or ''
+    status = detail.get('TranscriptionJobStatus')
+    logger.debug("job=%s status=%s", job_name, status)
+
+    # The rule matches every Transcribe job in the account; only jobs
+    # started by this API are published
+    if not API_JOB_NAME_PATTERN.fullmatch(job_name):
+        logger.info("Skipping job not started by the API: %s", job_name)
+        return
+
+    if status == 'COMPLETED':
+        # API jobs write their result to TRANSCRIPT_PREFIX in our bucket;
+        # jobs started elsewhere in the account have no object there
+        try:
+            transcript, language = read_s3_transcript(
+                BUCKET_NAME, f'{TRANSCRIPT_PREFIX}{job_name}.json')
+        except s3.exceptions.NoSuchKey:
+            logger.info("Skipping job without API transcript: %s", job_name)
+            return
+        result = {
+            'status': 'completed',
+            'job_name': job_name,
+            'transcript': transcript,
+            'language': language
+        }
+    elif status == 'FAILED':
+        result = {
+            'status': 'failed',
+            'job_name': job_name,
+            'error': detail.get('FailureReason', 'Unknown error')
+        }
+    else:
+        return
+
+    sns.publish(
+        TopicArn=TOPIC_ARN,
+        Message=orjson.dumps(result).decode(),
+        # Lets subscribers filter on a single job or status
+        MessageAttributes={
+            'job_name': {'DataType': 'String', 'StringValue': job_name},
+            'status': {'DataType': 'String', 'StringValue': result['status']}
+        }
+    )
+    logger.info("Published %s notification for: %s", result['status'], job_name)
+
+
+def job_cache_path(job_name):
+    """Cache file of a job, None if the name is not a valid job name"""
+    if not JOB_NAME_PATTERN.fullmatch(job_name) or job_name in ('.', '..'):
+        return None
+    return os.path.join(JOB_CACHE_DIR, f'{job_name}.json')
+
+
+def read_cached_status(job_name):
+    """Return cached (status_code, body) of a finished job or None"""
+    path = job_cache_path(job_name)
+    if path is None:
+        return None
+
+    try:
+        if time.time() - os.path.getmtime(path) > JOB_CACHE_TTL:
+            return None
+        with open(path, encoding='utf-8') as f:
+            cached = json.load(f)
+        return cached['status_code'], cached['body']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def cache_status(job_name, status_code, body):
+    """Store the response of a finished job in /tmp (best effort)"""
+    path = job_cache_path(job_name)
+    if path is None:
+        return
+
+    try:
+        os.makedirs(JOB_CACHE_DIR, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees a partial file
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'status_code': status_code, 'body': body}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not cache status of %s: %s", job_name, e)
+
+
+def parse_s3_url(url):
+    """Split S3 HTTPS URL (path or virtual-hosted style) into bucket and key"""
+    parsed = urlparse(url)
+    path = unquote(parsed.path.lstrip('/'))
+
+    if parsed.netloc.startswith(('s3.', 's3-')):
+        bucket, _, key = path.partition('/')
+    else:
+        bucket = parsed.netloc.split('.s3', 1)[0]
+        key = path
+
+    return bucket, key
+
+
+def read_transcript_summary(stream):
+    """
+    Incrementally parse transcript text and language from result JSON
+    Stops as soon as both are found, per-word items are never loaded
+    """
+    transcript = None
+    language = None
+
+    for prefix, event, value in ijson.parse(stream):
+        if prefix == 'results.transcripts.item.transcript':
+            transcript = value
+        elif prefix == 'results.language_code':
+            language = value
+        if transcript is not None and language is not None:
+            break
+
+    return transcript or '', language or 'unknown'
+
+
+def read_s3_transcript(bucket, key):
+    """Stream a transcript result object from S3 and return its summary"""
+    body = s3.get_object(Bucket=bucket, Key=key)['Body']
+    try:
+        return read_transcript_summary(body)
+    finally:
+        body.close()
+
+
+def upload_key(s3_uri):
+    """S3 key of an /upload/init upload URI, None if it is not one"""
+    if not isinstance(s3_uri, str) or not s3_uri.startswith('s3://'):
+        return None
+    bucket, _, s3_key = s3_uri[len('s3://'):].partition('/')
+    if bucket != BUCKET_NAME or not s3_key.startswith(UPLOAD_PREFIX):
+        return None
+    return s3_key
+
+
+def parse_content_type(content_type):
+    """Return lowercase audio/* or application/json media type, else ''"""
+    # content_type may come from a JSON body, so it is not always a string
+    if not isinstance(content_type, str):
+        return ''
+    match = CONTENT_TYPE_PATTERN.match(content_type)
+    return match.group(1).lower() if match else ''
 
 
 def get_media_format(s3_uri):
     """Determine media format from S3 URI"""
-    ext = s3_uri.lower().split('.')[-1]
-    format_map = {
-        'mp3': 'mp3',
-        'wav': 'wav',
-        'mp4': 'mp4',
-        'flac': 'flac',
-        'ogg': 'ogg',
-        'webm': 'webm'
-    }
-    return format_map.get(ext, 'wav')
+    ext = s3_uri.rsplit('.', 1)[-1].lower()
+    return MEDIA_FORMATS.get(ext, 'wav')
 
 
 def response(status_code, body):
@@ -247,5 +680,5 @@ def response(status_code, body):
             'Access-Control-Allow-Headers': 'Content-Type',
             'Access-Control-Allow-Methods': 'POST, GET, OPTIONS'
         },
-        'body': json.dumps(body)
+        'body': orjson.dumps(body).decode()
     }
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 """
 Test script for Audio Transcription API
-Tests binary upload, S3 URI, and status checking
+Tests pre-signed upload, multipart upload, S3 URI, and status checking
 """
 
 import json
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt import MultipartEncoder
 import os
 
 # Read API endpoint
@@ -22,22 +26,48 @@ print("Audio Transcription API - Test Suite")
 print("=" * 70)
 print(f"API Endpoint: {API_ENDPOINT}\n")
 
+# POST /presign and /upload/* live next to /transcribe on the same stage
+STAGE_URL = API_ENDPOINT.rsplit('/', 1)[0]
+PRESIGN_ENDPOINT = STAGE_URL + '/presign'
+UPLOAD_INIT_ENDPOINT = STAGE_URL + '/upload/init'
+UPLOAD_COMPLETE_ENDPOINT = STAGE_URL + '/upload/complete'
+UPLOAD_ABORT_ENDPOINT = STAGE_URL + '/upload/abort'
+
+# Parts uploaded to S3 at once
+UPLOAD_CONCURRENCY = 4
+
+# Status checks of several jobs run at once
+POLL_CONCURRENCY = 8
+
+# One keep-alive session for all API calls (TLS handshakes are reused)
+session = requests.Session()
+session.mount('https://', HTTPAdapter(pool_connections=1,
+                                      pool_maxsize=POLL_CONCURRENCY))
+
+# Status polling backoff: short delays first for fast jobs, then 30s steps
+POLL_DELAYS = (2, 4, 8, 15)
+POLL_MAX_DELAY = 30
+
 
 def wait_for_completion(job_name, max_wait=120):
-    """Poll status endpoint until job completes (every 10 seconds)"""
-    interval = 10
+    """Poll status endpoint until job completes (exponential backoff)"""
     print(f"Polling status for job: {job_name}")
     status_url = f"{API_ENDPOINT}/{job_name}"
     elapsed = 0
+    attempt = 0
 
     while elapsed < max_wait:
-        time.sleep(interval)
-        elapsed += interval
-        response = requests.get(status_url)
+        delay = (POLL_DELAYS[attempt] if attempt < len(POLL_DELAYS)
+                 else POLL_MAX_DELAY)
+        delay = min(delay, max_wait - elapsed)
+        attempt += 1
+        time.sleep(delay)
+        elapsed += delay
+        response = session.get(status_url)
         data = response.json()
 
         status = data.get('status')
-        print(f"  [{elapsed}s] Status: {status}")
+        print(f"  [{elapsed}s] {job_name}: {status}")
 
         if status == 'completed':
             return data
@@ -49,10 +79,67 @@ def wait_for_completion(job_name, max_wait=120):
     return None
 
 
+def wait_for_completions(job_names, max_wait=120):
+    """Poll several jobs concurrently, return {job_name: final status}"""
+    workers = min(len(job_names), POLL_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda job_name: wait_for_completion(job_name, max_wait),
+            job_names
+        )
+        return dict(zip(job_names, results))
+
+
+def upload_part(audio_file, part_size, part_number, url):
+    """PUT one part of the file to its pre-signed URL, return its ETag"""
+    with open(audio_file, 'rb') as f:
+        f.seek((part_number - 1) * part_size)
+        chunk = f.read(part_size)
+    s3_response = requests.put(url, data=chunk)
+    s3_response.raise_for_status()
+    return {'part_number': part_number, 'etag': s3_response.headers['ETag']}
+
+
+def upload_multipart(audio_file, content_type='audio/wav'):
+    """Upload file to S3 in parallel parts via /upload/init + /upload/complete"""
+    init = session.post(
+        UPLOAD_INIT_ENDPOINT,
+        json={'size': os.path.getsize(audio_file), 'content_type': content_type}
+    )
+    init.raise_for_status()
+    upload = init.json()
+
+    # Each worker reads only its own part (part_size bytes in memory)
+    try:
+        with ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY) as executor:
+            parts = list(executor.map(
+                lambda item: upload_part(audio_file, upload['part_size'], *item),
+                enumerate(upload['part_urls'], start=1)
+            ))
+    except Exception:
+        # Stored parts are billed until the upload is completed or aborted
+        session.post(
+            UPLOAD_ABORT_ENDPOINT,
+            json={'s3_uri': upload['s3_uri'], 'upload_id': upload['upload_id']}
+        )
+        raise
+
+    complete = session.post(
+        UPLOAD_COMPLETE_ENDPOINT,
+        json={
+            's3_uri': upload['s3_uri'],
+            'upload_id': upload['upload_id'],
+            'parts': parts
+        }
+    )
+    complete.raise_for_status()
+    return upload['s3_uri'], len(parts)
+
+
 def test_binary_upload():
-    """Test 1: Binary file upload"""
+    """Test 1: Direct upload to S3 via pre-signed POST"""
     print("\n" + "-" * 70)
-    print("TEST 1: Binary File Upload")
+    print("TEST 1: Pre-signed File Upload")
     print("-" * 70)
 
     audio_file = '../lab3/lab3.wav'
@@ -65,18 +152,44 @@ def test_binary_upload():
         with open(audio_file, 'wb') as f:
             f.write(b'RIFF' + b'\x00' * 100)  # Minimal WAV structure
 
-    with open(audio_file, 'rb') as f:
-        audio_data = f.read()
-
     print(f"File: {audio_file}")
-    print(f"Size: {len(audio_data)} bytes")
-    print("Uploading...")
+    print(f"Size: {os.path.getsize(audio_file)} bytes")
+
+    # Get pre-signed upload URL
+    print("Requesting upload URL...")
+    presign = session.post(
+        PRESIGN_ENDPOINT,
+        json={'content_type': 'audio/wav'}
+    )
+    if presign.status_code != 200:
+        print(f"\n✗ TEST 1 FAILED (presign returned {presign.status_code})")
+        return False
+    upload = presign.json()
+
+    # Upload straight to S3 (bytes don't pass through Lambda). The form is
+    # streamed from the file with a known Content-Length (S3 POST rejects
+    # chunked bodies); the file field must come after the policy fields
+    print("Uploading to S3...")
+    with open(audio_file, 'rb') as f:
+        form = MultipartEncoder(fields=[
+            *upload['fields'].items(),
+            ('file', (os.path.basename(audio_file), f, 'audio/wav'))
+        ])
+        s3_response = requests.post(
+            upload['upload_url'],
+            data=form,
+            headers={'Content-Type': form.content_type}
+        )
+    if s3_response.status_code not in (200, 204):
+        print(f"\n✗ TEST 1 FAILED (S3 upload returned {s3_response.status_code})")
+        return False
+    print(f"Uploaded to: {upload['s3_uri']}")
 
-    # POST binary data
-    response = requests.post(
+    # Start transcription
+    response = session.post(
         API_ENDPOINT,
-        data=audio_data,
-        headers={'Content-Type': 'audio/wav'}
+        json={'s3_uri': upload['s3_uri']},
+        headers={'Content-Type': 'application/json'}
     )
 
     print(f"Status Code: {response.status_code}")
@@ -114,7 +227,7 @@ def test_s3_uri():
     print("Sending request...")
 
     # POST JSON with S3 URI
-    response = requests.post(
+    response = session.post(
         API_ENDPOINT,
         json={'s3_uri': s3_uri},
         headers={'Content-Type': 'application/json'}
@@ -152,7 +265,7 @@ def test_error_cases():
 
     # Test 3a: Invalid job name
     print("\n3a. Testing invalid job name...")
-    response = requests.get(f"{API_ENDPOINT}/invalid-job-name-12345")
+    response = session.get(f"{API_ENDPOINT}/invalid-job-name-12345")
     print(f"Status Code: {response.status_code}")
 
     if response.status_code == 404:
@@ -162,7 +275,7 @@ def test_error_cases():
 
     # Test 3b: Missing data
     print("\n3b. Testing missing data...")
-    response = requests.post(
+    response = session.post(
         API_ENDPOINT,
         json={},
         headers={'Content-Type': 'application/json'}
@@ -178,15 +291,69 @@ def test_error_cases():
     return True
 
 
+def test_multipart_upload():
+    """Test 4: Multipart upload with parallel pre-signed part URLs"""
+    print("\n" + "-" * 70)
+    print("TEST 4: Multipart Upload")
+    print("-" * 70)
+
+    audio_file = '../lab3/lab3.wav'
+    if not os.path.exists(audio_file):
+        audio_file = 'test.wav'
+
+    print(f"File: {audio_file}")
+    print(f"Size: {os.path.getsize(audio_file)} bytes")
+
+    print("Uploading parts to S3...")
+    s3_uri, part_count = upload_multipart(audio_file)
+    print(f"Uploaded {part_count} part(s) to: {s3_uri}")
+
+    # Start transcription (completion polling is covered by TEST 1)
+    response = session.post(
+        API_ENDPOINT,
+        json={'s3_uri': s3_uri},
+        headers={'Content-Type': 'application/json'}
+    )
+    print(f"Status Code: {response.status_code}")
+
+    if response.status_code == 202:
+        print(f"Job: {response.json()['job_name']}")
+        print(f"\n✓ TEST 4 PASSED")
+        return True
+    else:
+        print(f"\n✗ TEST 4 FAILED (unexpected status code)")
+        return False
+
+
+def wait_for_jobs(job_names):
+    """Poll existing jobs (python test_api.py --wait <job_name> ...)"""
+    results = wait_for_completions(job_names)
+
+    print("\n" + "=" * 70)
+    print("JOB SUMMARY")
+    print("=" * 70)
+
+    for job_name, data in results.items():
+        status = data.get('status') if data else 'timeout'
+        print(f"{job_name:50} {status}")
+
+    print("=" * 70)
+    return all(data and data.get('status') == 'completed'
+               for data in results.values())
+
+
 if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--wait':
+        sys.exit(0 if wait_for_jobs(sys.argv[2:]) else 1)
+
     results = []
 
     # Run tests
     try:
-        results.append(('Binary Upload', test_binary_upload()))
+        results.append(('Presigned Upload', test_binary_upload()))
     except Exception as e:
         print(f"\n✗ TEST 1 ERROR: {e}")
-        results.append(('Binary Upload', False))
+        results.append(('Presigned Upload', False))
 
     try:
         results.append(('S3 URI', test_s3_uri()))
@@ -200,6 +367,12 @@ if __name__ == '__main__':
         print(f"\n✗ TEST 3 ERROR: {e}")
         results.append(('Error Handling', False))
 
+    try:
+        results.append(('Multipart Upload', test_multipart_upload()))
+    except Exception as e:
+        print(f"\n✗ TEST 4 ERROR: {e}")
+        results.append(('Multipart Upload', False))
+
     # Summary
     print("\n" + "=" * 70)
     print("TEST SUMMARY")
@@ -7,19 +7,61 @@ Lab 5: JPEG Image Analysis
 - Outputs annotated image and metadata JSON
 """
 
+import io
 import sys
-import json
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
+import numpy as np
 from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
 import cv2
+import orjson
+import piexif
+
+# Haar Cascade classifier, parsed once per process
+FACE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+_FACE_CASCADE = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+
+# IFD offsets that piexif already resolves into the 'Exif'/'GPS'/'Interop' dicts
+EXIF_POINTER_TAGS = frozenset({
+    piexif.ImageIFD.ExifTag,
+    piexif.ImageIFD.GPSTag,
+    piexif.ExifIFD.InteroperabilityTag,
+})
+
+# Larger images are downscaled before detection; boxes are scaled back up
+MAX_DETECTION_DIM = 4096
+MIN_FACE_SIZE = 40
+
+# OpenCV's Transparent API runs resize and cascade evaluation on an OpenCL
+# device (e.g. an integrated GPU) when the build and machine have one.
+# Set by enable_opencl() in the process that runs detection: an OpenCL
+# context must not be created before forking pool workers
+USE_OPENCL = False
+
+
+def enable_opencl():
+    """Probe for an OpenCL device and turn the backend on in this process"""
+    global USE_OPENCL
+    USE_OPENCL = cv2.ocl.haveOpenCL()
+    cv2.ocl.setUseOpenCL(USE_OPENCL)
+
+
+def _init_worker():
+    """Pool worker setup: one OpenCV thread, OpenCL probed after the fork"""
+    # One OpenCV thread per worker: the pool already fills the cores
+    cv2.setNumThreads(1)
+    enable_opencl()
 
 
 def validate_jpeg(file_path):
     """
     Validate if file is a valid JPEG
-    Checks magic bytes and Pillow can open it
+    Checks magic bytes and Pillow can read its header
+    Returns the file contents, which the later steps reuse instead of
+    reopening the file
     """
     print(f"Validating JPEG file: {file_path}")
 
@@ -27,66 +69,76 @@ def validate_jpeg(file_path):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
 
+    # Read the whole file once
+    data = Path(file_path).read_bytes()
+
     # Check JPEG magic bytes (FF D8 FF)
-    with open(file_path, 'rb') as f:
-        header = f.read(3)
-        if header[:2] != b'\xff\xd8':
-            raise ValueError(
-                "Not a valid JPEG file (missing FF D8 magic bytes)")
-        if header[2] != 0xff:
-            raise ValueError("Not a valid JPEG file (missing third FF byte)")
-
-    # Try to open with Pillow
+    if data[:2] != b'\xff\xd8':
+        raise ValueError(
+            "Not a valid JPEG file (missing FF D8 magic bytes)")
+    if len(data) < 3 or data[2] != 0xff:
+        raise ValueError("Not a valid JPEG file (missing third FF byte)")
+
+    # Try to open with Pillow (lazy: parses the header only, no marker walk;
+    # a corrupt scan still fails in cv2.imdecode)
     try:
-        img = Image.open(file_path)
-        img.verify()
+        img = Image.open(io.BytesIO(data))
         print(
             f"✓ Valid JPEG: {img.format} {img.size[0]}x{img.size[1]} {img.mode}")
-        return True
+        return data
     except Exception as e:
         raise ValueError(f"Cannot open image with Pillow: {e}")
 
 
-def extract_exif(file_path):
+def exif_value(value, tag_type):
+    """Convert a raw piexif value to a JSON-friendly string"""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='ignore').rstrip('\x00')
+    if tag_type in (piexif.TYPES.Rational, piexif.TYPES.SRational):
+        # Single rational is (num, den), multiple are ((num, den), ...)
+        if value and isinstance(value[0], tuple):
+            return str(tuple(num / den if den else num for num, den in value))
+        num, den = value
+        return str(num / den if den else num)
+    return str(value)
+
+
+def extract_exif(data):
     """
-    Extract EXIF metadata from JPEG
+    Extract EXIF metadata from JPEG bytes
     Returns dict with human-readable tags
+    (piexif parses the APP1 segment only, no image is decoded)
     """
     print("\nExtracting EXIF metadata...")
 
-    img = Image.open(file_path)
     exif_data = {}
 
     # Get EXIF data
     try:
-        exif_raw = img._getexif()
-
-        if exif_raw is None:
+        exif_raw = piexif.load(data)
+
+        # Convert numeric tags to names (main image and Exif sub-IFD)
+        for ifd in ('0th', 'Exif'):
+            for tag_id, value in exif_raw.get(ifd, {}).items():
+                if tag_id in EXIF_POINTER_TAGS:
+                    continue
+                tag = piexif.TAGS[ifd].get(tag_id, {})
+                exif_data[tag.get('name', tag_id)] = exif_value(
+                    value, tag.get('type'))
+
+        # Handle GPS data specially
+        if exif_raw.get('GPS'):
+            gps_data = {}
+            for tag_id, value in exif_raw['GPS'].items():
+                tag = piexif.TAGS['GPS'].get(tag_id, {})
+                gps_data[tag.get('name', tag_id)] = exif_value(
+                    value, tag.get('type'))
+            exif_data['GPSInfo'] = gps_data
+
+        if not exif_data:
             print("⚠ No EXIF data found in image")
             return exif_data
 
-        # Convert numeric tags to names
-        for tag_id, value in exif_raw.items():
-            tag_name = TAGS.get(tag_id, tag_id)
-
-            # Handle GPS data specially
-            if tag_name == "GPSInfo":
-                gps_data = {}
-                for gps_tag_id, gps_value in value.items():
-                    gps_tag_name = GPSTAGS.get(gps_tag_id, gps_tag_id)
-                    gps_data[gps_tag_name] = str(gps_value)
-                exif_data[tag_name] = gps_data
-            else:
-                # Convert to string to handle bytes and other types
-                try:
-                    if isinstance(value, bytes):
-                        exif_data[tag_name] = value.decode(
-                            'utf-8', errors='ignore')
-                    else:
-                        exif_data[tag_name] = str(value)
-                except:
-                    exif_data[tag_name] = str(value)
-
         print(f"✓ Extracted {len(exif_data)} EXIF tags")
 
         # Print key metadata
@@ -96,44 +148,61 @@ def extract_exif(file_path):
             if tag in exif_data:
                 print(f"  {tag}: {exif_data[tag]}")
 
-    except AttributeError:
-        print("⚠ No EXIF data found in image")
     except Exception as e:
         print(f"⚠ Error extracting EXIF: {e}")
 
     return exif_data
 
 
-def detect_faces(file_path):
+def detect_faces(data):
     """
-    Detect faces using Haar Cascade
+    Detect faces in JPEG bytes using Haar Cascade
     Returns image with red rectangles around faces and face count
+    (image is None when no faces are found - there is nothing to draw)
     """
     print("\nDetecting faces...")
 
-    # Load image with OpenCV
-    img = cv2.imread(file_path)
-    if img is None:
-        raise ValueError(f"Cannot load image with OpenCV: {file_path}")
-
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    # Decode straight to grayscale for detection (no BGR buffer or cvtColor)
+    buf = np.frombuffer(data, dtype=np.uint8)
+    gray = cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError("Cannot load image with OpenCV")
 
-    # Load Haar Cascade classifier
-    cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-    face_cascade = cv2.CascadeClassifier(cascade_path)
-
-    if face_cascade.empty():
+    # Haar Cascade classifier is loaded once at import
+    if _FACE_CASCADE.empty():
         raise ValueError("Failed to load Haar Cascade classifier")
 
-    faces = face_cascade.detectMultiScale(
+    # Bound detection work on large sensor JPEGs, but never shrink the
+    # smallest wanted face below the cascade's native window
+    h, w = gray.shape
+    window = max(_FACE_CASCADE.getOriginalWindowSize())
+    scale = min(1.0, max(MAX_DETECTION_DIM / max(h, w), window / MIN_FACE_SIZE))
+    if USE_OPENCL:
+        gray = cv2.UMat(gray)
+    if scale < 1.0:
+        gray = cv2.resize(gray, (int(w * scale), int(h * scale)),
+                          interpolation=cv2.INTER_AREA)
+    min_size = max(window, int(round(MIN_FACE_SIZE * scale)))
+
+    faces = _FACE_CASCADE.detectMultiScale(
         gray,
         scaleFactor=1.2,
         minNeighbors=6,
-        minSize=(40, 40),
+        minSize=(min_size, min_size),
     )
+    if scale < 1.0 and len(faces):
+        faces = (faces / scale).astype(int)
 
     print(f"✓ Detected {len(faces)} face(s)")
 
+    if len(faces) == 0:
+        return None, 0, faces
+
+    # Color image is only decoded when there are rectangles to draw
+    img = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Cannot load image with OpenCV")
+
     # Draw red rectangles around faces
     for i, (x, y, w, h) in enumerate(faces):
         # Red color in BGR format
@@ -153,28 +222,32 @@ def save_metadata(exif_data, faces, output_path):
         "faces": [
             {
                 "id": i + 1,
-                "x": int(x),
-                "y": int(y),
-                "width": int(w),
-                "height": int(h)
+                "x": x,
+                "y": y,
+                "width": w,
+                "height": h
             }
             for i, (x, y, w, h) in enumerate(faces)
         ]
     }
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    # orjson writes UTF-8 bytes and serializes OpenCV's numpy ints directly
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(
+            metadata,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_SERIALIZE_NUMPY
+        ))
 
     print(f"\n✓ Metadata saved to: {output_path}")
 
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python lab5.py <image.jpeg>")
-        sys.exit(1)
-
-    input_file = sys.argv[1]
-
+def process_one(input_file):
+    """
+    Analyze a single JPEG: validate, extract EXIF, detect faces and save
+    <stem>_faces.jpg and <stem>_metadata.json in the working directory
+    Returns True on success
+    """
     # Prepare output filenames
     base_name = Path(input_file).stem
     output_image = f"{base_name}_faces.jpg"
@@ -189,17 +262,20 @@ def main():
     print("=" * 70)
 
     try:
-        # Step 1: Validate JPEG
-        validate_jpeg(input_file)
+        # Step 1: Validate JPEG (the file is read only here)
+        data = validate_jpeg(input_file)
 
         # Step 2: Extract EXIF metadata
-        exif_data = extract_exif(input_file)
+        exif_data = extract_exif(data)
 
         # Step 3: Detect faces
-        img_with_faces, face_count, faces = detect_faces(input_file)
+        img_with_faces, face_count, faces = detect_faces(data)
 
-        # Step 4: Save annotated image
-        cv2.imwrite(output_image, img_with_faces)
+        # Step 4: Save annotated image (unchanged copy if no faces)
+        if img_with_faces is not None:
+            cv2.imwrite(output_image, img_with_faces)
+        else:
+            Path(output_image).write_bytes(data)
         print(f"\n✓ Annotated image saved to: {output_image}")
 
         # Step 5: Save metadata JSON
@@ -211,9 +287,62 @@ def main():
         print(f"Faces detected: {face_count}")
         print(f"EXIF tags: {len(exif_data)}")
         print("=" * 70)
+        return True
 
     except Exception as e:
         print(f"\n✗ Error: {e}")
+        return False
+
+
+def _process_captured(input_file):
+    """Run process_one in a worker process and return (ok, console output)"""
+    output = io.StringIO()
+    with redirect_stdout(output):
+        ok = process_one(input_file)
+    return ok, output.getvalue()
+
+
+def process_many(input_files):
+    """
+    Analyze several JPEGs in parallel worker processes
+    Reports are printed in input order once all images are done
+    """
+    # Outputs are named after the input stem, so equal stems would let
+    # workers overwrite each other's results
+    stems = Counter(Path(input_file).stem for input_file in input_files)
+    duplicates = sorted(stem for stem, count in stems.items() if count > 1)
+    if duplicates:
+        raise ValueError(
+            f"Inputs share an output name: {', '.join(duplicates)}")
+
+    workers = min(len(input_files), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker) as executor:
+        results = list(executor.map(_process_captured, input_files))
+
+    for _, output in results:
+        print(output, end='')
+    return [ok for ok, _ in results]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python lab5.py <image.jpeg> [<image.jpeg> ...]")
+        sys.exit(1)
+
+    input_files = sys.argv[1:]
+
+    if len(input_files) == 1:
+        enable_opencl()
+        ok = process_one(input_files[0])
+    else:
+        try:
+            ok = all(process_many(input_files))
+        except ValueError as e:
+            print(f"✗ Error: {e}")
+            ok = False
+
+    if not ok:
         sys.exit(1)
 
 